@@ -0,0 +1,92 @@
+import logging
+
+try:
+    import keyring
+    from keyring.backends import fail
+    from keyring.errors import KeyringError, PasswordDeleteError
+except ImportError:
+    keyring = None
+
+KEYRING_SERVICE = "Translatity"
+
+class APIKeyStore:
+    """Persists API keys one slot at a time in the system keyring, or in QSettings if there is none."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.use_keyring = keyring is not None and not isinstance(keyring.get_keyring(), fail.Keyring)
+        if not self.use_keyring:
+            logging.warning("No system keyring available, API keys will be stored in the settings file")
+
+    def load_all(self):
+        # Older versions stored the whole list in plaintext under a single setting
+        legacy_keys = self.settings.value("api_keys", [], type=list)
+        if legacy_keys:
+            # The old list is only dropped once every key has been stored in its slot
+            for index, key in enumerate(legacy_keys):
+                self.store(index, key)
+            self.set_count(len(legacy_keys))
+            self.settings.remove("api_keys")
+            return list(legacy_keys)
+
+        used_keyring = self.use_keyring
+        count = self.settings.value("api_key_count", 0, type=int)
+        keys = [key for key in (self.load(index) for index in range(count)) if key]
+        # Keys may only be unreadable because the keyring failed, so the slots are left alone then
+        if len(keys) != count and self.use_keyring == used_keyring:
+            for index, key in enumerate(keys):
+                self.store(index, key)
+            self.set_count(len(keys))
+        return keys
+
+    def load(self, index):
+        # Slots written while the keyring was unavailable live in the settings file. They are newer than
+        # whatever the keyring still holds for that slot, so they win and are moved into the keyring.
+        fallback_key = self.settings.value(f"api_key_{index}", "", type=str)
+        if self.use_keyring:
+            try:
+                if fallback_key:
+                    keyring.set_password(KEYRING_SERVICE, f"gemini_{index}", fallback_key)
+                    self.settings.remove(f"api_key_{index}")
+                    return fallback_key
+                key = keyring.get_password(KEYRING_SERVICE, f"gemini_{index}")
+                if key:
+                    return key
+            except KeyringError as e:
+                self.fall_back_to_settings(e)
+        return fallback_key
+
+    def store(self, index, key):
+        if self.use_keyring:
+            try:
+                keyring.set_password(KEYRING_SERVICE, f"gemini_{index}", key)
+                self.settings.remove(f"api_key_{index}")
+                return
+            except KeyringError as e:
+                self.fall_back_to_settings(e)
+        self.settings.setValue(f"api_key_{index}", key)
+
+    def delete(self, index):
+        if self.use_keyring:
+            try:
+                keyring.delete_password(KEYRING_SERVICE, f"gemini_{index}")
+            except PasswordDeleteError:
+                pass
+            except KeyringError as e:
+                self.fall_back_to_settings(e)
+        self.settings.remove(f"api_key_{index}")
+
+    def fall_back_to_settings(self, error):
+        # A locked keyring or a D-Bus failure shouldn't stop the app from starting or lose keys
+        logging.warning(f"System keyring failed ({error}), API keys will be stored in the settings file")
+        self.use_keyring = False
+
+    def remove(self, index, remaining_keys):
+        """Shift the slots after a removed key down by one and drop the last slot."""
+        for i in range(index, len(remaining_keys)):
+            self.store(i, remaining_keys[i])
+        self.delete(len(remaining_keys))
+        self.set_count(len(remaining_keys))
+
+    def set_count(self, count):
+        self.settings.setValue("api_key_count", count)
@@ -1,53 +1,134 @@
 # main_window.py
 import os
+import time
 import logging
+import threading
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QFileDialog, QTextEdit, QProgressBar, 
                              QListWidget, QMessageBox, QInputDialog, QLineEdit, QComboBox,
-                             QSplitter, QCheckBox, QListWidgetItem)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSettings
+                             QSplitter, QCheckBox, QListWidgetItem, QSpinBox)
+from PyQt6.QtCore import (Qt, QObject, QRunnable, QThread, QThreadPool, pyqtSignal, QTimer, QSettings,
+                          QStandardPaths, QSignalBlocker)
 from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QColor
 from pathlib import Path
 from datetime import datetime
-from .widgets import DraggableListWidget, FilePreview
+from .widgets import DraggableListView, FileQueueModel, FilePreview
 from .themes import apply_theme, get_color
+from .key_store import APIKeyStore
 from translation.translator import SRTTranslator
+from translation.cache import TranslationCache
 
-class TranslationWorker(QThread):
+# Minimum seconds between progress or status signals from one worker (about 20 per second)
+SIGNAL_INTERVAL = 0.05
+
+class TranslationSignals(QObject):
+    started = pyqtSignal(int)
     progress_update = pyqtSignal(int, int)
     status_update = pyqtSignal(str)
-    translation_complete = pyqtSignal(str, str)
-    translation_error = pyqtSignal(str)
-    finished = pyqtSignal()
+    translation_complete = pyqtSignal(int, str, str)
+    translation_error = pyqtSignal(int, str)
+    finished = pyqtSignal(int)
 
-    def __init__(self, translator, input_file, output_file, input_lang, output_lang, context):
+class TranslationRunnable(QRunnable):
+    def __init__(self, index, translator, input_file, output_file, input_lang, output_lang, context, batch_size):
         super().__init__()
+        # QRunnable is not a QObject, so signals live on a helper owned by the GUI thread
+        self.signals = TranslationSignals()
+        self.index = index
         self.translator = translator
         self.input_file = input_file
         self.output_file = output_file
         self.input_lang = input_lang
         self.output_lang = output_lang
         self.context = context
+        self.batch_size = batch_size
+        self.last_percent = -1
+        self.last_progress_time = 0.0
+        self.last_status_time = 0.0
+        # Batches report from several executor threads, and held-back values are sent later by a timer
+        self.emit_lock = threading.Lock()
+        self.pending_percent = None
+        self.pending_status = None
+        self.flush_timer = None
         self.is_cancelled = False
 
     def run(self):
+        if self.is_cancelled:
+            return
+        self.signals.started.emit(self.index)
         try:
-            self.translator.translate_file(
-                self.input_file,
-                self.output_file,
-                progress_callback=self.progress_update.emit,
-                status_callback=self.status_update.emit,
-                input_lang=self.input_lang,
-                output_lang=self.output_lang,
-                context=self.context,
-                cancel_check=self.check_cancelled
-            )
+            try:
+                self.translator.translate_file(
+                    self.input_file,
+                    self.output_file,
+                    progress_callback=self.emit_progress,
+                    status_callback=self.emit_status,
+                    input_lang=self.input_lang,
+                    output_lang=self.output_lang,
+                    context=self.context,
+                    cancel_check=self.check_cancelled,
+                    batch_size=self.batch_size
+                )
+            finally:
+                # Whatever the throttle held back goes out before the file is reported as done
+                self.flush_signals()
             if not self.is_cancelled:
-                self.translation_complete.emit(self.input_file, self.output_file)
+                self.signals.translation_complete.emit(self.index, self.input_file, self.output_file)
         except Exception as e:
-            self.translation_error.emit(str(e))
+            self.signals.translation_error.emit(self.index, str(e))
         finally:
-            self.finished.emit()
+            self.signals.finished.emit(self.index)
+
+    def emit_progress(self, current, total):
+        # Only cross threads when the visible percentage actually changes
+        percent = (current * 100) // total if total else 100
+        with self.emit_lock:
+            self.pending_percent = percent if percent != self.last_percent else None
+            # Every cross-thread emit queues an event on the GUI thread, so bursts are thinned out
+            now = time.monotonic()
+            if current >= total or now - self.last_progress_time >= SIGNAL_INTERVAL:
+                self.flush_progress(now)
+            else:
+                self.schedule_flush(self.last_progress_time + SIGNAL_INTERVAL - now)
+
+    def emit_status(self, status):
+        with self.emit_lock:
+            self.pending_status = f"{Path(self.input_file).name}: {status}"
+            now = time.monotonic()
+            if now - self.last_status_time >= SIGNAL_INTERVAL:
+                self.flush_status(now)
+            else:
+                self.schedule_flush(self.last_status_time + SIGNAL_INTERVAL - now)
+
+    def flush_progress(self, now):
+        if self.pending_percent is not None:
+            self.last_percent = self.pending_percent
+            self.last_progress_time = now
+            self.pending_percent = None
+            self.signals.progress_update.emit(self.index, self.last_percent)
+
+    def flush_status(self, now):
+        if self.pending_status is not None:
+            self.last_status_time = now
+            status, self.pending_status = self.pending_status, None
+            self.signals.status_update.emit(status)
+
+    def schedule_flush(self, delay):
+        # A held-back value must still show up if no further update arrives, e.g. during a long request
+        if self.flush_timer is None:
+            self.flush_timer = threading.Timer(delay, self.flush_signals)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+
+    def flush_signals(self):
+        """Emit the latest progress and status values the throttle held back."""
+        with self.emit_lock:
+            if self.flush_timer:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            now = time.monotonic()
+            self.flush_progress(now)
+            self.flush_status(now)
 
     def check_cancelled(self):
         return self.is_cancelled
@@ -67,13 +148,29 @@ class MainWindow(QMainWindow):
         self.layout = QVBoxLayout(self.central_widget)
 
         self.api_keys = []
+        self.translator = None
+        self.highlighted_key_row = -1
         self.file_queue = []
         self.failed_files = set()
         self.is_translation_running = False
+        self.refresh_color_cache()
+        self.pool = QThreadPool(self)
+        self.runnables = []
         self.settings = QSettings("ArthurCarrenho", "Translatity")
+        self.key_store = APIKeyStore(self.settings)
+        cache_dir = Path(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation))
+        self.tm_cache = TranslationCache(cache_dir / "tm.sqlite")
+        self.tm_cache.sweep()
         self.setup_ui()
         self.load_settings()
 
+    def refresh_color_cache(self, is_dark_mode=False):
+        # Queue and key list updates look colors up per item, so resolve them once per theme
+        self.colors = {name: get_color(name, is_dark_mode)
+                       for name in ('background', 'highlight', 'success', 'error')}
+        if hasattr(self, 'queue_model'):
+            self.queue_model.set_colors(self.colors)
+
     def setup_ui(self):
         # Main layout split
         splitter = QSplitter(Qt.Orientation.Horizontal)
@@ -93,7 +190,9 @@ class MainWindow(QMainWindow):
         left_layout.addLayout(file_layout)
 
         # File queue
-        self.queue_list = DraggableListWidget(self)
+        self.queue_model = FileQueueModel(self.colors, self)
+        self.queue_list = DraggableListView(self)
+        self.queue_list.setModel(self.queue_model)
         self.queue_list.items_reordered.connect(self.update_file_queue)
         self.queue_list.item_deleted.connect(self.remove_file_from_queue)
         left_layout.addWidget(QLabel("Translation Queue:"))
@@ -110,6 +209,10 @@ class MainWindow(QMainWindow):
         self.clear_queue_button = QPushButton("Clear Queue")
         self.clear_queue_button.clicked.connect(self.clear_queue)
         queue_buttons_layout.addWidget(self.clear_queue_button)
+
+        self.clear_cache_button = QPushButton("Clear Cache")
+        self.clear_cache_button.clicked.connect(self.clear_cache)
+        queue_buttons_layout.addWidget(self.clear_cache_button)
         
         left_layout.addLayout(queue_buttons_layout)
 
@@ -126,6 +229,16 @@ class MainWindow(QMainWindow):
         lang_layout.addWidget(self.output_lang)
         left_layout.addLayout(lang_layout)
 
+        # Batch size
+        batch_layout = QHBoxLayout()
+        self.batch_size_input = QSpinBox()
+        self.batch_size_input.setRange(1, 1000)
+        self.batch_size_input.setValue(100)
+        self.batch_size_input.setToolTip("Number of subtitle blocks sent to the model per request")
+        batch_layout.addWidget(QLabel("Blocks per request:"))
+        batch_layout.addWidget(self.batch_size_input)
+        left_layout.addLayout(batch_layout)
+
         # Context input
         self.context_input = QTextEdit()
         self.context_input.setPlaceholderText("Enter context for translation (e.g., movie genre, character names)")
@@ -134,7 +247,7 @@ class MainWindow(QMainWindow):
 
         # Translation button
         self.translate_button = QPushButton("Translate Queue")
-        self.translate_button.clicked.connect(self.start_translation_queue)
+        self.translate_button.clicked.connect(self.toggle_translation)
         left_layout.addWidget(self.translate_button)
 
         # Progress bar
@@ -173,18 +286,23 @@ class MainWindow(QMainWindow):
 
         splitter.addWidget(right_panel)
 
-        # Connect queue selection to preview
-        self.queue_list.currentItemChanged.connect(self.update_file_preview)
+        # Connect queue selection to preview, debounced so arrow-key bursts load only the final file
+        self.pending_preview_path = None
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(50)
+        self.preview_timer.timeout.connect(self.load_pending_preview)
+        self.queue_list.selectionModel().currentChanged.connect(self.update_file_preview)
 
     def select_files(self):
         file_names, _ = QFileDialog.getOpenFileNames(self, "Select SRT File(s)", "", "SRT Files (*.srt)")
         if file_names:
             self.file_queue.extend(file_names)
-            self.update_queue_list()
+            self.queue_model.append_files(file_names, self.failed_files)
             self.file_label.setText(f"{len(self.file_queue)} file(s) in queue")
 
     def clear_queue(self):
-        if self.queue_list.count() > 0:
+        if self.queue_model.rowCount() > 0:
             reply = QMessageBox.question(
                 self, 
                 "Clear Queue", 
@@ -193,22 +311,35 @@ class MainWindow(QMainWindow):
             )
             
             if reply == QMessageBox.StandardButton.Yes:
-                self.queue_list.clear()
                 self.file_queue.clear()
                 self.failed_files.clear()
+                self.update_queue_list()
                 self.retry_button.setEnabled(False)
+                self.preview_timer.stop()
+                self.pending_preview_path = None
                 self.file_label.setText("No file selected")
-                self.file_preview.setPlainText("")
+                self.file_preview.clear_preview()
                 self.progress_bar.setValue(0)
                 self.update_status("Queue cleared")
 
+    def clear_cache(self):
+        reply = QMessageBox.question(
+            self,
+            "Clear Cache",
+            "Are you sure you want to clear the translation cache?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+
+        if reply == QMessageBox.StandardButton.Yes:
+            self.tm_cache.clear()
+            self.update_status("Translation cache cleared")
+
     def update_queue_list(self):
-        self.queue_list.clear()
-        for i, file in enumerate(self.file_queue):
-            item = QListWidgetItem(Path(file).name)
-            if i in self.failed_files:
-                item.setBackground(get_color('error'))
-            self.queue_list.addItem(item)
+        # Rebuild in one pass without selection signals kicking off preview loads
+        with QSignalBlocker(self.queue_list.selectionModel()):
+            self.queue_list.setUpdatesEnabled(False)
+            self.queue_model.set_files(self.file_queue, self.failed_files)
+            self.queue_list.setUpdatesEnabled(True)
         self.enable_retry_if_needed()
 
     def enable_retry_if_needed(self):
@@ -221,53 +352,44 @@ class MainWindow(QMainWindow):
         if not self.failed_files:
             return
 
-        failed_indices = sorted(list(self.failed_files), reverse=True)
-        retry_files = []
-        
-        for index in failed_indices:
-            if index < len(self.file_queue):
-                file_path = self.file_queue[index]
-                retry_files.append(file_path)
-                logging.info(f"Moving failed file for retry: {file_path}")
-                del self.file_queue[index]
-                item = self.queue_list.takeItem(index)
-                if item:
-                    item.setBackground(QColor())
-
-        self.file_queue.extend(retry_files)
-        self.update_queue_list()
-        
+        retry_files = [f for f in self.file_queue if f in self.failed_files]
+        for file_path in retry_files:
+            logging.info(f"Moving failed file for retry: {file_path}")
+        self.file_queue = [f for f in self.file_queue if f not in self.failed_files] + retry_files
+
         self.failed_files.clear()
+        self.update_queue_list()
         self.retry_button.setEnabled(False)
         
         if not self.is_translation_running:
             self.start_translation_queue()
 
     def update_file_queue(self):
-        new_queue = []
-        for i in range(self.queue_list.count()):
-            item = self.queue_list.item(i)
-            file_path = next((f for f in self.file_queue if Path(f).name == item.text()), None)
-            if file_path:
-                new_queue.append(file_path)
-        self.file_queue = new_queue
+        # The model carries full paths, so reordering needs no name matching
+        self.file_queue = self.queue_model.paths()
 
     def remove_file_from_queue(self, index):
         if 0 <= index < len(self.file_queue):
-            del self.file_queue[index]
-            new_failed = set()
-            for failed_index in self.failed_files:
-                if failed_index > index:
-                    new_failed.add(failed_index - 1)
-                elif failed_index < index:
-                    new_failed.add(failed_index)
-            self.failed_files = new_failed
-        self.update_queue_list()
+            removed_path = self.file_queue.pop(index)
+            if removed_path not in self.file_queue:
+                self.failed_files.discard(removed_path)
+        # The list view has already dropped the row from the model
+        self.enable_retry_if_needed()
 
     def update_file_preview(self, current, previous):
-        if current:
-            file_path = self.file_queue[self.queue_list.row(current)]
-            self.file_preview.load_file(file_path)
+        if current.isValid():
+            self.pending_preview_path = current.data(FileQueueModel.PathRole)
+            self.preview_timer.start()
+
+    def load_pending_preview(self):
+        if self.pending_preview_path:
+            self.file_preview.load_file(self.pending_preview_path)
+
+    def toggle_translation(self):
+        if self.is_translation_running:
+            self.cancel_translation()
+        else:
+            self.start_translation_queue()
 
     def start_translation_queue(self):
         if not self.file_queue:
@@ -280,92 +402,83 @@ class MainWindow(QMainWindow):
             return
 
         self.is_translation_running = True
-        self.translator = SRTTranslator(api_keys)
-        self.translator.key_rotator.key_changed.connect(self.highlight_current_api_key)
-        self.current_file_index = 0
-        self.highlight_current_api_key(0)
+        # Workers address their queue row by index, so rows must stay put until the run ends
+        self.queue_list.set_locked(True)
+        self.clear_queue_button.setEnabled(False)
+        self.runnables = []
+        self.completed_count = 0
+        self.file_progress = [0] * len(self.file_queue)
+        # Files are independent and API-bound, so run up to one per API key concurrently
+        self.pool.setMaxThreadCount(max(1, min(len(api_keys), QThread.idealThreadCount() - 1)))
+        self.translator.reset_state()
+        self.highlight_current_api_key(self.translator.key_rotator.current_key_index)
         self.translate_button.setText("Cancel Translation")
-        self.translate_button.clicked.disconnect()
-        self.translate_button.clicked.connect(self.cancel_translation)
         self.retry_button.setEnabled(False)
-        self.translate_next_file()
+        self.progress_bar.setValue(0)
 
-    def translate_next_file(self):
-        if self.current_file_index < len(self.file_queue):
-            input_file = self.file_queue[self.current_file_index]
+        input_lang = self.input_lang.currentText()
+        output_lang = self.output_lang.currentText()
+        context = self.context_input.toPlainText()
+        batch_size = self.batch_size_input.value()
+        for index, input_file in enumerate(self.file_queue):
             output_file = f"output_{Path(input_file).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.srt"
-            
-            self.translation_worker = TranslationWorker(
-                self.translator,
-                input_file,
-                output_file,
-                self.input_lang.currentText(),
-                self.output_lang.currentText(),
-                self.context_input.toPlainText()
-            )
-            self.translation_worker.progress_update.connect(self.update_progress)
-            self.translation_worker.status_update.connect(self.update_status)
-            self.translation_worker.translation_complete.connect(self.file_translation_complete)
-            self.translation_worker.translation_error.connect(self.translation_error)
-            self.translation_worker.finished.connect(self.translation_finished)
-            
-            self.translation_worker.start()
-            self.progress_bar.setValue(0)
-            self.update_status(f"Translating: {Path(input_file).name}")
-            if self.current_file_index < self.queue_list.count():
-                item = self.queue_list.item(self.current_file_index)
-                if item:
-                    item.setBackground(get_color('highlight'))
-        else:
-            self.queue_translation_complete()
+            runnable = TranslationRunnable(index, self.translator, input_file, output_file,
+                                           input_lang, output_lang, context, batch_size)
+            runnable.signals.started.connect(self.translation_started)
+            runnable.signals.progress_update.connect(self.update_progress)
+            runnable.signals.status_update.connect(self.update_status)
+            runnable.signals.translation_complete.connect(self.file_translation_complete)
+            runnable.signals.translation_error.connect(self.translation_error)
+            runnable.signals.finished.connect(self.translation_finished)
+            self.runnables.append(runnable)
+            self.pool.start(runnable)
+
+    def translation_started(self, index):
+        self.queue_model.set_status(index, 'running')
+        self.update_status(f"Translating: {Path(self.runnables[index].input_file).name}")
 
     def cancel_translation(self):
-        if hasattr(self, 'translation_worker'):
-            self.translation_worker.cancel()
+        if self.runnables:
+            self.pool.clear()
+            for runnable in self.runnables:
+                runnable.cancel()
+                runnable.signals.blockSignals(True)
             self.update_status("Translation cancelled")
             self.translation_cancelled()
 
     def translation_cancelled(self):
         self.is_translation_running = False
+        self.queue_list.set_locked(False)
+        self.clear_queue_button.setEnabled(True)
         self.translate_button.setText("Translate Queue")
-        self.translate_button.clicked.disconnect()
-        self.translate_button.clicked.connect(self.start_translation_queue)
         self.enable_retry_if_needed()
         QMessageBox.information(self, "Translation Cancelled", "The translation process has been cancelled.")
 
-    def file_translation_complete(self, input_file, output_file):
-        if self.current_file_index < self.queue_list.count():
-            item = self.queue_list.item(self.current_file_index)
-            if item:
-                item.setBackground(get_color('success'))
+    def file_translation_complete(self, index, input_file, output_file):
+        # Throttled or skipped blocks can leave the last reported percentage short of the end
+        self.update_progress(index, 100)
+        self.queue_model.set_status(index, 'done')
         self.update_status(f"Completed: {Path(input_file).name}")
 
-    def translation_error(self, error_message):
+    def translation_error(self, index, error_message):
         self.update_status(f"Error: {error_message}")
-        if self.current_file_index < self.queue_list.count():
-            item = self.queue_list.item(self.current_file_index)
-            if item:
-                item.setBackground(get_color('error'))
-                self.failed_files.add(self.current_file_index)
-                self.enable_retry_if_needed()
-                logging.error(f"Translation failed for file at index {self.current_file_index}: {error_message}")
-
-    def translation_finished(self):
-        if hasattr(self, 'translation_worker'):
-            self.current_file_index += 1
-            if self.current_file_index < len(self.file_queue):
-                QTimer.singleShot(100, self.translate_next_file)
-            else:
-                self.is_translation_running = False
-                self.queue_translation_complete()
-                self.enable_retry_if_needed()
+        self.queue_model.set_status(index, 'failed')
+        self.failed_files.add(self.runnables[index].input_file)
+        self.enable_retry_if_needed()
+        logging.error(f"Translation failed for file at index {index}: {error_message}")
+
+    def translation_finished(self, index):
+        # Signals are delivered on the GUI thread, so the counter needs no locking
+        self.completed_count += 1
+        if self.completed_count == len(self.runnables):
+            self.queue_translation_complete()
 
     def queue_translation_complete(self):
         self.is_translation_running = False
+        self.queue_list.set_locked(False)
+        self.clear_queue_button.setEnabled(True)
         self.update_status("Translation queue completed")
         self.translate_button.setText("Translate Queue")
-        self.translate_button.clicked.disconnect()
-        self.translate_button.clicked.connect(self.start_translation_queue)
         
         if self.failed_files:
             message = f"Queue completed with {len(self.failed_files)} failed files. Use 'Retry Failed Files' to attempt translation again."
@@ -375,27 +488,41 @@ class MainWindow(QMainWindow):
         
         QMessageBox.information(self, "Queue Complete", message)
 
-    def update_progress(self, current, total):
-        self.progress_bar.setValue(int((current / total) * 100))
+    def update_progress(self, index, percent):
+        self.file_progress[index] = percent
+        self.progress_bar.setValue(sum(self.file_progress) // len(self.file_progress))
 
     def update_status(self, status):
         self.status_label.setText(status)
 
     def load_settings(self):
-        self.api_keys = self.settings.value("api_keys", [], type=list)
+        self.api_keys = self.key_store.load_all()
         self.update_api_key_list()
+        self.update_translator_keys()
         self.input_lang.setCurrentText(self.settings.value("input_lang", "English", type=str))
         self.output_lang.setCurrentText(self.settings.value("output_lang", "Portuguese", type=str))
         self.context_input.setPlainText(self.settings.value("context", "", type=str))
+        self.batch_size_input.setValue(self.settings.value("batch_size", 100, type=int))
 
     def save_settings(self):
-        self.settings.setValue("api_keys", self.api_keys)
         self.settings.setValue("input_lang", self.input_lang.currentText())
         self.settings.setValue("output_lang", self.output_lang.currentText())
         self.settings.setValue("context", self.context_input.toPlainText())
+        self.settings.setValue("batch_size", self.batch_size_input.value())
+
+    def update_translator_keys(self):
+        # The translator is kept across queue runs and only told about key changes
+        if not self.api_keys:
+            self.translator = None
+        elif self.translator is None:
+            self.translator = SRTTranslator(self.api_keys, cache=self.tm_cache)
+            self.translator.key_rotator.key_changed.connect(self.highlight_current_api_key)
+        else:
+            self.translator.update_keys(self.api_keys)
 
     def update_api_key_list(self):
         self.api_key_list.clear()
+        self.highlighted_key_row = -1
         for key in self.api_keys:
             item = QListWidgetItem(self.mask_api_key(key))
             self.api_key_list.addItem(item)
@@ -411,7 +538,9 @@ class MainWindow(QMainWindow):
         key, ok = QInputDialog.getText(self, "Add API Key", "Enter Gemini API Key:", QLineEdit.EchoMode.Password)
         if ok and key:
             self.add_api_key_to_list(key)
-            self.save_settings()
+            self.key_store.store(len(self.api_keys) - 1, key)
+            self.key_store.set_count(len(self.api_keys))
+            self.update_translator_keys()
 
     def edit_api_key(self, item):
         index = self.api_key_list.row(item)
@@ -420,7 +549,8 @@ class MainWindow(QMainWindow):
         if ok and new_key:
             self.api_keys[index] = new_key
             self.update_api_key_list()
-            self.save_settings()
+            self.key_store.store(index, new_key)
+            self.update_translator_keys()
 
     def remove_api_key(self):
         current_item = self.api_key_list.currentItem()
@@ -428,7 +558,8 @@ class MainWindow(QMainWindow):
             index = self.api_key_list.row(current_item)
             del self.api_keys[index]
             self.update_api_key_list()
-            self.save_settings()
+            self.key_store.remove(index, self.api_keys)
+            self.update_translator_keys()
 
     def get_api_keys(self):
         return self.api_keys
@@ -438,20 +569,21 @@ class MainWindow(QMainWindow):
             event.acceptProposedAction()
 
     def dropEvent(self, event: QDropEvent):
-        for url in event.mimeData().urls():
-            file_path = url.toLocalFile()
-            if file_path.lower().endswith('.srt'):
-                self.file_queue.append(file_path)
-        self.update_queue_list()
+        new_files = [url.toLocalFile() for url in event.mimeData().urls()
+                     if url.toLocalFile().lower().endswith('.srt')]
+        self.file_queue.extend(new_files)
+        self.queue_model.append_files(new_files, self.failed_files)
         self.file_label.setText(f"{len(self.file_queue)} file(s) in queue")
 
     def highlight_current_api_key(self, index):
-        for i in range(self.api_key_list.count()):
-            item = self.api_key_list.item(i)
-            if i == index:
-                item.setBackground(get_color('highlight'))
-            else:
-                item.setBackground(get_color('background'))
+        # Only the previously highlighted row and the new one need repainting
+        previous_item = self.api_key_list.item(self.highlighted_key_row)
+        if previous_item:
+            previous_item.setBackground(self.colors['background'])
+        current_item = self.api_key_list.item(index)
+        if current_item:
+            current_item.setBackground(self.colors['highlight'])
+        self.highlighted_key_row = index
 
     def closeEvent(self, event):
         self.save_settings()
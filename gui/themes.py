@@ -1,26 +1,41 @@
 from PyQt6.QtGui import QColor
 
+_LIGHT = {
+    'background': QColor('#ffffff'),
+    'text': QColor('#000000'),
+    'highlight': QColor('#fff700'),
+    'success': QColor('#90EE90'),
+    'error': QColor('#FFB6C1'),
+}
+
+_DARK = {
+    'background': QColor('#2b2b2b'),
+    'text': QColor('#ffffff'),
+    'highlight': QColor('#4a4a4a'),
+    'success': QColor('#006400'),
+    'error': QColor('#8B0000'),
+}
+
+_DEFAULT = QColor('#000000')
+
 def get_color(name, is_dark_mode=False):
-    colors = {
-        'background': QColor('#2b2b2b') if is_dark_mode else QColor('#ffffff'),
-        'text': QColor('#ffffff') if is_dark_mode else QColor('#000000'),
-        'highlight': QColor('#4a4a4a') if is_dark_mode else QColor('#fff700'),
-        'success': QColor('#006400') if is_dark_mode else QColor('#90EE90'),
-        'error': QColor('#8B0000') if is_dark_mode else QColor('#FFB6C1'),
-    }
-    return colors.get(name, QColor('#000000'))
+    # Both palettes are built once at import; callers get a copy they are free to modify
+    return QColor((_DARK if is_dark_mode else _LIGHT).get(name, _DEFAULT))
+
+DARK_STYLESHEET = """
+    QWidget { background-color: #2b2b2b; color: #ffffff; }
+    QTextEdit, QPlainTextEdit, QListWidget, QListView { background-color: #363636; border: 1px solid #545454; }
+    QPushButton { background-color: #4a4a4a; border: 1px solid #646464; padding: 5px; }
+    QPushButton:hover { background-color: #5a5a5a; }
+    QProgressBar { border: 1px solid #646464; }
+    QProgressBar::chunk { background-color: #3a3a3a; }
+    QComboBox { background-color: #4a4a4a; border: 1px solid #646464; }
+    QComboBox QAbstractItemView { background-color: #2b2b2b; border: 1px solid #646464; }
+"""
 
 def apply_theme(window, is_dark_mode):
-    if is_dark_mode:
-        window.setStyleSheet("""
-            QWidget { background-color: #2b2b2b; color: #ffffff; }
-            QTextEdit, QPlainTextEdit, QListWidget { background-color: #363636; border: 1px solid #545454; }
-            QPushButton { background-color: #4a4a4a; border: 1px solid #646464; padding: 5px; }
-            QPushButton:hover { background-color: #5a5a5a; }
-            QProgressBar { border: 1px solid #646464; }
-            QProgressBar::chunk { background-color: #3a3a3a; }
-            QComboBox { background-color: #4a4a4a; border: 1px solid #646464; }
-            QComboBox QAbstractItemView { background-color: #2b2b2b; border: 1px solid #646464; }
-        """)
-    else:
-        window.setStyleSheet("")
\ No newline at end of file
+    # Light mode keeps the native style, so no sheet is installed for it; setting the
+    # sheet the window already has would only make Qt restyle every widget for nothing
+    stylesheet = DARK_STYLESHEET if is_dark_mode else ""
+    if window.styleSheet() != stylesheet:
+        window.setStyleSheet(stylesheet)
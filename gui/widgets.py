@@ -1,41 +1,193 @@
-from PyQt6.QtWidgets import QListWidget, QPlainTextEdit, QMenu
-from PyQt6.QtCore import pyqtSignal, Qt
+import os
+from collections import OrderedDict
+from pathlib import Path
+from PyQt6.QtWidgets import QListView, QPlainTextEdit, QMenu
+from PyQt6.QtCore import (pyqtSignal, Qt, QObject, QRunnable, QThreadPool, QAbstractListModel,
+                          QModelIndex)
 
-class DraggableListWidget(QListWidget):
+PREVIEW_LIMIT = 1024
+PREVIEW_CACHE_SIZE = 8
+
+class FileQueueModel(QAbstractListModel):
+    """List model holding [path, status] entries for the translation queue."""
+
+    PathRole = Qt.ItemDataRole.UserRole
+    STATUS_COLORS = {'running': 'highlight', 'done': 'success', 'failed': 'error'}
+
+    def __init__(self, colors, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self.colors = colors
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        path, status = self.entries[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return Path(path).name
+        if role == Qt.ItemDataRole.ToolTipRole or role == self.PathRole:
+            return path
+        if role == Qt.ItemDataRole.BackgroundRole and status in self.STATUS_COLORS:
+            return self.colors[self.STATUS_COLORS[status]]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid():
+            return flags | Qt.ItemFlag.ItemIsDragEnabled
+        return flags | Qt.ItemFlag.ItemIsDropEnabled
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def moveRows(self, source_parent, source_row, count, destination_parent, destination_child):
+        if count != 1 or destination_child in (source_row, source_row + 1):
+            return False
+        if not self.beginMoveRows(source_parent, source_row, source_row, destination_parent, destination_child):
+            return False
+        entry = self.entries.pop(source_row)
+        self.entries.insert(destination_child - 1 if destination_child > source_row else destination_child, entry)
+        self.endMoveRows()
+        return True
+
+    def set_files(self, paths, failed_files):
+        self.beginResetModel()
+        self.entries = [[path, 'failed' if path in failed_files else 'queued'] for path in paths]
+        self.endResetModel()
+
+    def append_files(self, paths, failed_files):
+        if not paths:
+            return
+        first = len(self.entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(paths) - 1)
+        self.entries.extend([path, 'failed' if path in failed_files else 'queued'] for path in paths)
+        self.endInsertRows()
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.entries[row]
+        self.endRemoveRows()
+
+    def set_status(self, row, status):
+        if 0 <= row < len(self.entries):
+            self.entries[row][1] = status
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.BackgroundRole])
+
+    def set_colors(self, colors):
+        self.colors = colors
+        if self.entries:
+            self.dataChanged.emit(self.index(0), self.index(len(self.entries) - 1), [Qt.ItemDataRole.BackgroundRole])
+
+    def paths(self):
+        return [path for path, _ in self.entries]
+
+class DraggableListView(QListView):
     items_reordered = pyqtSignal()
     item_deleted = pyqtSignal(int)
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setDragDropMode(QListWidget.DragDropMode.InternalMove)
-        self.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+        self.locked = False
+        self.setDragDropMode(QListView.DragDropMode.InternalMove)
+        self.setDefaultDropAction(Qt.DropAction.MoveAction)
+        self.setSelectionMode(QListView.SelectionMode.SingleSelection)
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
 
+    def set_locked(self, locked):
+        """Disable reordering and deleting rows, e.g. while workers report status by row."""
+        self.locked = locked
+        self.setDragDropMode(QListView.DragDropMode.NoDragDrop if locked else QListView.DragDropMode.InternalMove)
+
     def dropEvent(self, event):
-        super().dropEvent(event)
-        self.items_reordered.emit()
+        source_row = self.currentIndex().row()
+        target = self.indexAt(event.position().toPoint())
+        if not target.isValid():
+            target_row = self.model().rowCount()
+        elif self.dropIndicatorPosition() == QListView.DropIndicatorPosition.BelowItem:
+            target_row = target.row() + 1
+        else:
+            target_row = target.row()
+        # Move the row in place; ignoring the action keeps the drag source from removing it afterwards
+        moved = source_row >= 0 and self.model().moveRow(QModelIndex(), source_row, QModelIndex(), target_row)
+        event.setDropAction(Qt.DropAction.IgnoreAction)
+        event.accept()
+        if moved:
+            self.items_reordered.emit()
 
     def show_context_menu(self, position):
         menu = QMenu()
         delete_action = menu.addAction("Delete")
+        delete_action.setEnabled(not self.locked)
         action = menu.exec(self.mapToGlobal(position))
         if action == delete_action:
-            current_item = self.itemAt(position)
-            if current_item:
-                row = self.row(current_item)
-                self.takeItem(row)
+            index = self.indexAt(position)
+            if index.isValid():
+                row = index.row()
+                self.model().remove_row(row)
                 self.item_deleted.emit(row)
 
+class PreviewSignals(QObject):
+    preview_ready = pyqtSignal(object, str, bool)
+
+class PreviewLoader(QRunnable):
+    def __init__(self, cache_key):
+        super().__init__()
+        self.signals = PreviewSignals()
+        self.cache_key = cache_key
+
+    def run(self):
+        file_path = self.cache_key[0]
+        loaded = True
+        try:
+            # Only the head of the file is shown, so never read past it
+            with open(file_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+                content = f.read(PREVIEW_LIMIT + 1)
+            if len(content) > PREVIEW_LIMIT:
+                content = content[:PREVIEW_LIMIT] + "..."
+        except Exception as e:
+            content = f"Error loading file: {str(e)}"
+            loaded = False
+        self.signals.preview_ready.emit(self.cache_key, content, loaded)
+
 class FilePreview(QPlainTextEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setReadOnly(True)
+        self.current_path = None
+        self.preview_cache = OrderedDict()
 
     def load_file(self, file_path):
+        self.current_path = file_path
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.setPlainText(content[:1000] + "..." if len(content) > 1000 else content)
-        except Exception as e:
-            self.setPlainText(f"Error loading file: {str(e)}")
\ No newline at end of file
+            cache_key = (file_path, os.path.getmtime(file_path))
+        except OSError as e:
+            self.setPlainText(f"Error loading file: {str(e)}")
+            return
+
+        if cache_key in self.preview_cache:
+            self.preview_cache.move_to_end(cache_key)
+            self.setPlainText(self.preview_cache[cache_key])
+            return
+
+        # Read on a pool thread so selecting a large file doesn't block the GUI
+        loader = PreviewLoader(cache_key)
+        loader.signals.preview_ready.connect(self.preview_loaded)
+        QThreadPool.globalInstance().start(loader)
+
+    def preview_loaded(self, cache_key, content, loaded):
+        if loaded:
+            self.preview_cache[cache_key] = content
+            self.preview_cache.move_to_end(cache_key)
+            while len(self.preview_cache) > PREVIEW_CACHE_SIZE:
+                self.preview_cache.popitem(last=False)
+        if cache_key[0] == self.current_path:
+            self.setPlainText(content)
+
+    def clear_preview(self):
+        self.current_path = None
+        self.setPlainText("")
@@ -4,6 +4,8 @@ from gui.main_window import MainWindow
 
 def main():
     app = QApplication(sys.argv)
+    app.setOrganizationName("ArthurCarrenho")
+    app.setApplicationName("Translatity")
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
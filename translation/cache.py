@@ -0,0 +1,88 @@
+import sqlite3
+import hashlib
+import logging
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_TTL = 30 * 24 * 60 * 60
+SCHEMA_VERSION = 2
+
+class TranslationCache:
+    """SQLite-backed translation memory shared by all translation workers."""
+
+    def __init__(self, db_path):
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Workers run on pool threads, so the connection is shared behind a lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # Entries from older layouts can't be told apart by context, so they are dropped
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS tm")
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tm (h BLOB, ctx BLOB, src TEXT, dst TEXT, out TEXT, ts INTEGER, "
+                "ci INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (h, ctx))"
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def make_key(input_lang, output_lang, text):
+        return hashlib.blake2b(f"{input_lang}|{output_lang}|{text}".encode('utf-8'), digest_size=16).digest()
+
+    @staticmethod
+    def make_context_key(context):
+        return hashlib.blake2b(context.encode('utf-8'), digest_size=8).digest()
+
+    def get(self, input_lang, output_lang, context, text):
+        """Look up a translation made under the same context, or one known not to depend on it."""
+        key = self.make_key(input_lang, output_lang, text)
+        context_key = self.make_context_key(context)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT out FROM tm WHERE h = ? AND (ctx = ? OR ci = 1) ORDER BY ctx = ? DESC LIMIT 1",
+                (key, context_key, context_key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, input_lang, output_lang, context, translations):
+        """Store a {source text: translated text} mapping in a single transaction."""
+        now = int(time.time())
+        context_key = self.make_context_key(context)
+        rows = [(self.make_key(input_lang, output_lang, text), context_key, input_lang, output_lang, out, now)
+                for text, out in translations.items()]
+        if not rows:
+            return
+        # An upsert rather than INSERT OR REPLACE, which would reset the ci flag of rows stored again
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO tm (h, ctx, src, dst, out, ts) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(h, ctx) DO UPDATE SET src = excluded.src, dst = excluded.dst, "
+                "out = excluded.out, ts = excluded.ts",
+                rows
+            )
+        logging.info(f"Cached {len(rows)} translated blocks")
+
+    def mark_context_insensitive(self, input_lang, output_lang, context, texts):
+        """Let the given texts' translations under this context be reused under any context."""
+        context_key = self.make_context_key(context)
+        rows = [(self.make_key(input_lang, output_lang, text), context_key) for text in texts]
+        if not rows:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany("UPDATE tm SET ci = 1 WHERE h = ? AND ctx = ?", rows)
+        logging.info(f"Marked {len(rows)} cached blocks as context-independent")
+
+    def sweep(self, ttl=DEFAULT_TTL):
+        with self.lock, self.conn:
+            deleted = self.conn.execute("DELETE FROM tm WHERE ts < ?", (int(time.time()) - ttl,)).rowcount
+        if deleted:
+            logging.info(f"Removed {deleted} expired cache entries")
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM tm")
+
@@ -1,12 +1,31 @@
 import time
 import logging
+import mmap
+import os
 from pathlib import Path
-import google.generativeai as genai
-from google.api_core import exceptions
 import random
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import cycle
 from PyQt6.QtCore import QObject, pyqtSignal
 
+SRT_BUFFER_SIZE = 1 << 20
+REQUESTS_PER_KEY = 2
+# One in this many newly translated blocks is re-translated without context before it is cached
+CONTEXT_CHECK_RATE = 32
+# Follow-up requests per batch for blocks the model skipped
+MAX_FILL_ROUNDS = 3
+
+_BLANKLINE_SPLIT_RE = re.compile(r'\n\s*\n')
+_BLOCK_START_RE = re.compile(r'^\d+\s*\n')
+_BLOCK_PARTS_RE = re.compile(r'^(\d+)\s*\n(\d{1,2}:\d{2}:\d{2}[,.]\d{1,3}\s*-->[^\n]*)\n?(.*)$', re.DOTALL)
+# The colon must be followed by a space, so a line such as "10:30 sharp" is not taken for entry 10
+_NUMBERED_LINE_RE = re.compile(r'^(\d+):(?:\s+|$)(.*)$')
+# Stands in for line breaks inside a subtitle, so every subtitle is sent as a single numbered line
+# Line breaks travel as a literal \n, with backslashes doubled so text can never contain the marker by accident
+_ESCAPED_LINE_BREAK_RE = re.compile(r'\\\\|\s*\\n\s*')
+
 class APIKeyRotator(QObject):
     # APIKeyRotator implementation remains the same
     key_changed = pyqtSignal(int)
@@ -15,10 +34,18 @@ class APIKeyRotator(QObject):
         super().__init__()
         if not api_keys:
             raise ValueError("At least one API key must be provided")
-        self.api_keys = api_keys
+        self.api_keys = list(api_keys)
         self.current_key_index = 0
         self.exhausted_keys = set()
 
+    def update_keys(self, api_keys):
+        if not api_keys:
+            raise ValueError("At least one API key must be provided")
+        self.api_keys = list(api_keys)
+        self.exhausted_keys &= set(self.api_keys)
+        if self.current_key_index >= len(self.api_keys):
+            self.current_key_index = 0
+
     def get_current_key(self):
         return self.api_keys[self.current_key_index]
 
@@ -34,20 +61,45 @@ class APIKeyRotator(QObject):
         return len(self.exhausted_keys) < len(self.api_keys)
 
 class SRTTranslator:
-    def __init__(self, api_keys):
+    def __init__(self, api_keys, cache=None):
         self.key_rotator = APIKeyRotator(api_keys)
-        self.model = self._initialize_model()
+        self.cache = cache
+        # One model per key, so batches running side by side can each use a different key
+        self.models = {}
         self.last_request_time = 0
         self.base_delay = 30
         self.max_retries = 5
         self.max_backoff = 300
-        self.chat = None
-        # Add counters for 99% completion check
-        self.near_completion_count = 0
-        self.last_block_count = 0
+        # Several files can be translated at once, so key rotation is serialized
+        self.rotation_lock = threading.Lock()
+        self.request_slots = threading.BoundedSemaphore(len(api_keys) * REQUESTS_PER_KEY)
+
+    def update_keys(self, api_keys):
+        with self.rotation_lock:
+            self.key_rotator.update_keys(api_keys)
+            # Drop the models of removed keys; chats still using one keep it alive until they finish
+            for api_key in self.models.keys() - set(api_keys):
+                del self.models[api_key]
+        self.request_slots = threading.BoundedSemaphore(len(api_keys) * REQUESTS_PER_KEY)
+
+    def reset_state(self):
+        """Give keys exhausted during a previous queue run another chance."""
+        self.key_rotator.exhausted_keys.clear()
+
+    def _get_model(self, api_key):
+        """Return the cached model for a configured key. Call with rotation_lock held."""
+        # Creating a model for a removed key would undo the cleanup in update_keys
+        if api_key not in self.key_rotator.api_keys:
+            raise ValueError("API key is no longer configured")
+        if api_key not in self.models:
+            self.models[api_key] = self._initialize_model(api_key)
+        return self.models[api_key]
+
+    def _initialize_model(self, api_key):
+        # The SDK pulls in grpc and google-auth, so it is only imported once a model is needed
+        import google.generativeai as genai
+        from google.ai import generativelanguage as glm
 
-    def _initialize_model(self):
-        genai.configure(api_key=self.key_rotator.get_current_key())
         generation_config = {
             "temperature": 1,
             "top_p": 0.95,
@@ -74,46 +126,37 @@ class SRTTranslator:
             }
         ]
         
-        return genai.GenerativeModel(
+        model = genai.GenerativeModel(
             model_name="gemini-1.5-pro",
             generation_config=generation_config,
             safety_settings=safety_settings
         )
+        # genai.configure() sets a single process-wide key, so each model gets a client of its own.
+        # The SDK has no public per-model client option; _client is what GenerativeModel lazily fills
+        # from the global client, which is why google-generativeai is pinned to 0.8.6 in the readme.
+        model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+        return model
 
-    def _check_near_completion(self, current_blocks, total_blocks):
-        """Check if translation is near completion (≥99%) for consecutive tries."""
-        completion_percentage = (current_blocks / total_blocks) * 100
-        
-        if completion_percentage >= 99:
-            if current_blocks == self.last_block_count:
-                self.near_completion_count += 1
-            else:
-                self.near_completion_count = 1
-        else:
-            self.near_completion_count = 0
-            
-        self.last_block_count = current_blocks
-        return self.near_completion_count >= 2
+    def _make_api_request(self, chat_session, message, retry_count=0, generation_config=None):
+        from google.api_core import exceptions
 
-    def _make_api_request(self, chat_session, message, is_continuation=False, retry_count=0):
         try:
             self._wait_with_backoff(retry_count)
             
-            if is_continuation:
-                response = chat_session.send_message("continue")
-            else:
-                if isinstance(message, list):
-                    message = "\n---\n".join(message)
-                response = chat_session.send_message(message)
+            if isinstance(message, list):
+                message = "\n---\n".join(message)
+            # Bound in-flight requests across every file and batch sharing this translator
+            with self.request_slots:
+                response = chat_session.send_message(message, generation_config=generation_config)
             
             return response
             
         except exceptions.ResourceExhausted as e:
             if retry_count >= self.max_retries - 1:
-                self._handle_quota_exhaustion()
-                return self._make_api_request(chat_session, message, is_continuation, 0)
+                self._handle_quota_exhaustion(chat_session)
+                return self._make_api_request(chat_session, message, 0, generation_config)
             logging.warning(f"Resource exhausted, retrying... ({retry_count + 1}/{self.max_retries})")
-            return self._make_api_request(chat_session, message, is_continuation, retry_count + 1)
+            return self._make_api_request(chat_session, message, retry_count + 1, generation_config)
             
         except Exception as e:
             logging.error(f"Unexpected error during API request: {e}")
@@ -130,23 +173,120 @@ class SRTTranslator:
             logging.info(f"Backing off for {delay:.2f} seconds (attempt {retry_count}/{self.max_retries})")
             time.sleep(delay)
 
-    def _handle_quota_exhaustion(self):
-        current_key = self.key_rotator.get_current_key()
-        self.key_rotator.mark_key_exhausted(current_key)
-        
+    def _handle_quota_exhaustion(self, chat_session):
+        """Move a chat whose key ran out of quota over to the next key that still has some."""
+        with self.rotation_lock:
+            # The key may have been removed since the chat started, in which case there is nothing to mark
+            exhausted_key = next((key for key, model in self.models.items() if model is chat_session.model), None)
+            if exhausted_key is not None:
+                self.key_rotator.mark_key_exhausted(exhausted_key)
+
+            # The chat history is kept, only the key its requests go out with changes
+            chat_session.model = self._get_model(self._next_available_key())
+
+    def _next_available_key(self):
+        """Rotate past exhausted keys and return the current one. Call with rotation_lock held."""
         if not self.key_rotator.has_available_keys():
             raise Exception("All API keys have been exhausted")
-            
-        self.key_rotator.rotate_key()
-        self.model = self._initialize_model()
 
-    def _create_chat(self):
-        self.chat = self.model.start_chat()
-        return self.chat
+        # Another batch may already have rotated away from this key
+        while self.key_rotator.get_current_key() in self.key_rotator.exhausted_keys:
+            self.key_rotator.rotate_key()
+        return self.key_rotator.get_current_key()
+
+    def _batch_model(self, api_key):
+        """Return the model for a batch's key, or for the current key if that one was exhausted or removed."""
+        with self.rotation_lock:
+            if api_key not in self.key_rotator.api_keys or api_key in self.key_rotator.exhausted_keys:
+                api_key = self._next_available_key()
+            return self._get_model(api_key)
+
+    def _available_keys(self):
+        with self.rotation_lock:
+            return [key for key in self.key_rotator.api_keys if key not in self.key_rotator.exhausted_keys]
+
+    def _translate_batch(self, batch, api_key, system_message, cancel_check=None, status_callback=None,
+                         generation_config=None):
+        """Translate one batch of blocks in its own chat on the given key. Returns None if cancelled."""
+        if cancel_check and cancel_check():
+            return None
+
+        # Batches wait in the executor, so the key they were given may have been exhausted or removed meanwhile
+        chat = self._batch_model(api_key).start_chat()
+        # Timings never need translating, so only numbered text goes out and the timings are put back here
+        response = self._make_api_request(chat, [
+            system_message,
+            format_numbered_lines(batch),
+            "Translate the provided subtitles. Reply with each subtitle's number, a colon and its translation."
+        ], generation_config=generation_config)
+        batch_numbers = {block[0] for block in batch}
+        translated_by_number = parse_numbered_lines(response.text, batch_numbers)
+
+        # Long batches can be cut off by the output token limit or come back with blocks skipped,
+        # so only the missing blocks are sent again, all in one request
+        for _ in range(MAX_FILL_ROUNDS):
+            missing = [block for block in batch if block[0] not in translated_by_number]
+            if not missing:
+                break
+            if cancel_check and cancel_check():
+                return None
+
+            if status_callback:
+                status_callback(f"Translating {len(missing)} missing blocks...")
+            response = self._make_api_request(chat, [
+                format_numbered_lines(missing),
+                "Translate exactly these subtitles, keeping their numbers."
+            ], generation_config=generation_config)
+            filled = parse_numbered_lines(response.text, batch_numbers - translated_by_number.keys())
+            if not filled:
+                break
+            translated_by_number.update(filled)
+
+        if len(translated_by_number) != len(batch):
+            logging.warning(f"Expected {len(batch)} blocks but received {len(translated_by_number)}, "
+                            "the rest keep their original text")
+        return [format_srt_block(number, timing, translated_by_number[number])
+                for number, timing, _ in batch if number in translated_by_number]
+
+    def _check_context_sensitivity(self, sample, api_key, input_lang, output_lang, context, batch_size,
+                                   cancel_check=None):
+        """Translate a sample of blocks with and without context and return the texts that come out the same."""
+        # Both sides are translated deterministically, otherwise sampling noise would read as context dependence
+        deterministic = {"temperature": 0}
+        system_messages = (build_system_message(input_lang, output_lang, context),
+                           build_system_message(input_lang, output_lang, ""))
+        stable_texts = []
+        try:
+            for i in range(0, len(sample), batch_size):
+                batch = sample[i:i + batch_size]
+                results = [self._translate_batch(batch, api_key, system_message, cancel_check,
+                                                 generation_config=deterministic)
+                           for system_message in system_messages]
+                if None in results:
+                    return []
+                contextual, contextless = (match_translations(batch, result) for result in results)
+                stable_texts.extend(text for text, translated in contextless.items()
+                                    if contextual.get(text) == translated)
+        except Exception as e:
+            # The check only decides what the cache may share, so a failure must not fail the file
+            logging.warning(f"Context sensitivity check failed: {e}")
+            return []
+        return stable_texts
+
+    def _load_from_cache(self, source_blocks, input_lang, output_lang, context):
+        """Return translated blocks for every source block found in the cache."""
+        if not self.cache:
+            return []
+        translated = []
+        for number, timing, text in source_blocks:
+            cached_text = self.cache.get(input_lang, output_lang, context, text)
+            if cached_text is not None:
+                translated.append(format_srt_block(number, timing, cached_text))
+        return translated
 
     def translate_file(self, input_path, output_path, save_progress=True, progress_callback=None, 
                       status_callback=None, input_lang="English", output_lang="Portuguese", 
-                      context="", cancel_check=None):
+                      context="", cancel_check=None, batch_size=100):
         input_path = Path(input_path)
         output_path = Path(output_path)
         progress_path = output_path.with_suffix('.progress')
@@ -154,12 +294,30 @@ class SRTTranslator:
         if not input_path.exists():
             raise FileNotFoundError(f"Input file not found: {input_path}")
 
-        with open(input_path, 'r', encoding='utf-8') as f:
-            input_content = f.read()
-            total_blocks = count_srt_blocks(input_content)
-            logging.info(f"Total SRT blocks in input file: {total_blocks}")
-            if status_callback:
-                status_callback(f"Total SRT blocks: {total_blocks}")
+        # SRT numbers repeat in merged or spliced files, so blocks are identified by their position instead.
+        # Prompts, the progress file and the cache all use that id; the original number only returns in the output.
+        # Blocks that don't parse are never sent, but keep their place in the output unchanged
+        raw_blocks = split_srt_blocks(read_srt(input_path))
+        parsed_blocks = {}
+        for block_id, block in enumerate(raw_blocks, 1):
+            parsed = parse_srt_block(block)
+            if parsed:
+                parsed_blocks[block_id] = parsed
+        source_blocks = [(block_id, timing, text) for block_id, (_, timing, text) in parsed_blocks.items()]
+        total_blocks = len(source_blocks)
+        if len(raw_blocks) != total_blocks:
+            logging.warning(f"{len(raw_blocks) - total_blocks} blocks could not be parsed and are copied unchanged")
+        logging.info(f"Total SRT blocks in input file: {total_blocks}")
+        if status_callback:
+            status_callback(f"Total SRT blocks: {total_blocks}")
+
+        # Repeated lines are translated once and copied to every block that uses them
+        first_blocks = {}
+        for block in source_blocks:
+            first_blocks.setdefault(block[2], block)
+        unique_blocks = list(first_blocks.values())
+        total_unique = len(unique_blocks)
+        logging.info(f"Unique subtitle lines to translate: {total_unique}")
 
         translated_content = []
         if save_progress and progress_path.exists():
@@ -169,79 +327,104 @@ class SRTTranslator:
                 if translated_blocks:
                     translated_content = translated_blocks
                     current_blocks = len(translated_blocks)
-                    logging.info(f"Loaded {current_blocks}/{total_blocks} blocks from progress file")
+                    logging.info(f"Loaded {current_blocks}/{total_unique} blocks from progress file")
                     if status_callback:
-                        status_callback(f"Loaded {current_blocks}/{total_blocks} blocks from progress")
+                        status_callback(f"Loaded {current_blocks}/{total_unique} blocks from progress")
                     if progress_callback:
-                        progress_callback(current_blocks, total_blocks)
+                        progress_callback(current_blocks, total_unique)
+
+        translated_numbers = {parsed[0] for parsed in map(parse_srt_block, translated_content) if parsed}
+        cached_blocks = self._load_from_cache(
+            [block for block in unique_blocks if block[0] not in translated_numbers],
+            input_lang, output_lang, context
+        )
+        if cached_blocks:
+            translated_content.extend(cached_blocks)
+            logging.info(f"Loaded {len(cached_blocks)} blocks from translation cache")
+            if status_callback:
+                status_callback(f"Loaded {len(cached_blocks)}/{total_unique} blocks from cache")
+            if progress_callback:
+                progress_callback(len(translated_content), total_unique)
 
-        chat = self._create_chat()
-        
         try:
-            if not translated_content:
-                if status_callback:
-                    status_callback("Starting translation...")
-                
-                system_message = f"""You are a professional subtitle translator. Your task is to translate subtitles from {input_lang} to {output_lang}.
-                Maintain the SRT format and timing. Fix capitalization where needed. Preserve any special formatting or tags.
-                Context for this translation: {context}
-                Translate the content naturally, considering the context and maintaining the original tone and style."""
-                
-                response = self._make_api_request(chat, [
-                    system_message,
-                    input_content,
-                    "Translate the provided subtitle file. Maintain SRT format and timing."
-                ])
-                
-                current_blocks = len(extract_srt_blocks(response.text))
-                translated_content.extend(extract_srt_blocks(response.text))
-                logging.info(f"Translated {current_blocks}/{total_blocks} blocks")
-                if status_callback:
-                    status_callback(f"Translated {current_blocks}/{total_blocks} blocks")
-                if progress_callback:
-                    progress_callback(current_blocks, total_blocks)
-                
-                if save_progress:
-                    with open(progress_path, 'w', encoding='utf-8') as f:
-                        f.write('\n\n'.join(translated_content))
-            
-            while len(translated_content) < total_blocks:
-                if cancel_check and cancel_check():
-                    logging.info("Translation cancelled")
-                    if status_callback:
-                        status_callback("Translation cancellation requested")
-                    return
+            # Blocks recovered from the progress file or the cache are not sent again
+            translated_numbers = {parsed[0] for parsed in map(parse_srt_block, translated_content) if parsed}
+            pending_blocks = [block for block in unique_blocks if block[0] not in translated_numbers]
+            if pending_blocks and status_callback:
+                status_callback("Starting translation...")
+
+            system_message = build_system_message(input_lang, output_lang, context)
+
+            batches = [pending_blocks[i:i + batch_size] for i in range(0, len(pending_blocks), batch_size)]
+            available_keys = self._available_keys()
+            if batches and not available_keys:
+                raise Exception("All API keys have been exhausted")
+            # Batches are independent requests, so several are kept in flight per API key
+            executor = ThreadPoolExecutor(max_workers=len(self.key_rotator.api_keys) * REQUESTS_PER_KEY)
+            # Only each batch's new blocks are appended, instead of rewriting the whole file every time
+            progress_file = open(progress_path, 'a', encoding='utf-8', buffering=1 << 16) if save_progress else None
+            if progress_file and progress_file.tell():
+                # Keep the first appended block apart from whatever an earlier run left at the end
+                progress_file.write('\n\n')
+            # Once this file has ended, for whatever reason, its remaining batches stop at their next
+            # check and no longer report status for it
+            file_done = threading.Event()
+
+            def batch_cancel_check():
+                return file_done.is_set() or bool(cancel_check and cancel_check())
 
-                # Check if we're at 99% completion for 2 consecutive tries
-                if self._check_near_completion(len(translated_content), total_blocks):
-                    logging.info("Translation reached 99% completion for 2 consecutive tries. Marking as complete.")
+            def batch_status_callback(status):
+                if status_callback and not file_done.is_set():
+                    status_callback(status)
+
+            check_future = None
+            try:
+                # The context check runs alongside the batches instead of holding up the finished file
+                if self.cache and context and batches:
+                    check_future = executor.submit(self._check_context_sensitivity,
+                                                   pending_blocks[::CONTEXT_CHECK_RATE], available_keys[0],
+                                                   input_lang, output_lang, context, batch_size, batch_cancel_check)
+                # Spread the batches round-robin over the keys that still have quota
+                futures = [executor.submit(self._translate_batch, batch, api_key, system_message,
+                                           batch_cancel_check, batch_status_callback)
+                           for batch, api_key in zip(batches, cycle(available_keys))]
+                for future in as_completed(futures):
+                    batch_translated = future.result()
+                    if batch_translated is None or (cancel_check and cancel_check()):
+                        logging.info("Translation cancelled")
+                        if status_callback:
+                            status_callback("Translation cancellation requested")
+                        return
+
+                    translated_content.extend(batch_translated)
+                    current_blocks = len(translated_content)
+                    logging.info(f"Translated {current_blocks}/{total_unique} blocks")
                     if status_callback:
-                        status_callback("Translation completed (99% threshold reached)")
-                    break
+                        status_callback(f"Translated {current_blocks}/{total_unique} blocks")
+                    if progress_callback:
+                        progress_callback(current_blocks, total_unique)
+
+                    if progress_file:
+                        progress_file.writelines(block + '\n\n' for block in batch_translated)
+                        progress_file.flush()
+                stable_texts = check_future.result() if check_future else []
+            finally:
+                file_done.set()
+                # Requests already in flight are waited for, so nothing from this file outlives it
+                executor.shutdown(wait=True, cancel_futures=True)
+                if progress_file:
+                    progress_file.close()
+
+            translations = match_translations(unique_blocks, translated_content)
+            if self.cache:
+                self.cache.put_many(input_lang, output_lang, context, translations)
+                self.cache.mark_context_insensitive(input_lang, output_lang, context, stable_texts)
+            # Stream the blocks into the buffered writer instead of materializing them all first
+            output_blocks = build_output_blocks(raw_blocks, parsed_blocks, translations)
 
-                if status_callback:
-                    status_callback("Continuing translation...")
-                response = self._make_api_request(chat, "continue", is_continuation=True)
-                new_blocks = extract_srt_blocks(response.text)
-                
-                for block in new_blocks:
-                    if block not in translated_content:
-                        translated_content.append(block)
-                
-                current_blocks = len(translated_content)
-                logging.info(f"Translated {current_blocks}/{total_blocks} blocks")
-                if status_callback:
-                    status_callback(f"Translated {current_blocks}/{total_blocks} blocks")
-                if progress_callback:
-                    progress_callback(current_blocks, total_blocks)
-                
-                if save_progress:
-                    with open(progress_path, 'w', encoding='utf-8') as f:
-                        f.write('\n\n'.join(translated_content))
-                
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write('\n\n'.join(translated_content))
+            with open(output_path, 'w', encoding='utf-8', buffering=SRT_BUFFER_SIZE, newline='') as f:
+                f.writelines(output_blocks)
             
             if save_progress and progress_path.exists():
                 progress_path.unlink()
@@ -253,16 +436,103 @@ class SRTTranslator:
         except Exception as e:
             logging.error(f"Error during translation: {e}")
             raise
-        finally:
-            if self.chat:
-                self.chat = None
 
-def count_srt_blocks(content):
-    """Count the number of SRT blocks in the content."""
-    blocks = re.findall(r'^\d+\s*\n\d{2}:\d{2}:\d{2},\d{3}\s*-->', content, re.MULTILINE)
-    return len(blocks)
+def build_system_message(input_lang, output_lang, context):
+    """Build the instructions sent at the start of every translation chat."""
+    return f"""You are a professional subtitle translator. Your task is to translate subtitles from {input_lang} to {output_lang}.
+            Each subtitle is given on one line as its number, a colon and its text; keep the numbers and write line breaks inside a subtitle as \\n and keep every backslash doubled. Fix capitalization where needed. Preserve any special formatting or tags.
+            Context for this translation: {context}
+            Translate the content naturally, considering the context and maintaining the original tone and style."""
+
+def read_srt(path):
+    """Read an SRT file's text through a memory map."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        # Decode straight from the mapping, so the file is never copied into a bytes object
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, 'utf-8-sig', 'replace')
+    # Bytes skip text-mode newline translation, so CRLF and CR line endings are normalized here
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+def split_srt_blocks(content):
+    """Split content into its non-empty blank-line separated blocks, whatever they contain."""
+    blocks = (block.strip() for block in _BLANKLINE_SPLIT_RE.split(content))
+    return [block for block in blocks if block]
 
 def extract_srt_blocks(content):
     """Extract individual SRT blocks from content."""
-    blocks = [block.strip() for block in re.split(r'\n\s*\n', content) if block.strip()]
-    return [block for block in blocks if re.match(r'^\d+\s*\n', block)]
\ No newline at end of file
+    return [block for block in split_srt_blocks(content) if _BLOCK_START_RE.match(block)]
+
+def parse_srt_block(block):
+    """Split an SRT block into (number, timing, text), or None if it is malformed."""
+    match = _BLOCK_PARTS_RE.match(block)
+    if not match:
+        return None
+    return int(match.group(1)), match.group(2).strip(), match.group(3).strip()
+
+def format_srt_block(number, timing, text):
+    """Build an SRT block from its parts."""
+    return f"{number}\n{timing}\n{text}"
+
+def format_numbered_lines(blocks):
+    """Build a prompt payload of one "number: text" line per block, leaving out the timings."""
+    return '\n'.join(f"{number}: {escape_line_breaks(text)}" for number, _, text in blocks)
+
+def parse_numbered_lines(content, numbers):
+    """Map block number to text for the "number: text" entries in content whose number is one of the given numbers."""
+    texts = {}
+    current = None
+    # Unnumbered lines only count as part of an entry once another entry follows them,
+    # so closing remarks after the last entry are never attached to it
+    pending = []
+    for line in content.splitlines():
+        stripped = line.strip()
+        match = _NUMBERED_LINE_RE.match(stripped)
+        if match:
+            if current is not None:
+                texts[current].extend(pending)
+            pending = []
+            number = int(match.group(1))
+            # Numbers outside the request, or repeated ones, are skipped along with anything under them
+            current = number if number in numbers and number not in texts else None
+            if current is not None:
+                texts[current] = [match.group(2)]
+        elif not stripped or stripped.startswith('```'):
+            current = None
+            pending = []
+        elif current is not None:
+            # The model sometimes breaks a subtitle over several lines anyway; those belong to the entry above
+            pending.append(stripped)
+    return {number: unescape_line_breaks('\n'.join(lines).strip()) for number, lines in texts.items()}
+
+def escape_line_breaks(text):
+    """Put a block's text on one line by writing its line breaks as \\n."""
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+def unescape_line_breaks(text):
+    """Undo escape_line_breaks, dropping any spaces the model put around a line break."""
+    return _ESCAPED_LINE_BREAK_RE.sub(lambda match: '\\' if match.group() == '\\\\' else '\n', text)
+
+def build_output_blocks(raw_blocks, parsed_blocks, translations):
+    """Yield the output blocks in input order, copying blocks that could not be parsed as they are."""
+    for block_id, block in enumerate(raw_blocks, 1):
+        parsed = parsed_blocks.get(block_id)
+        if parsed is None:
+            yield block + '\n\n'
+        else:
+            number, timing, text = parsed
+            yield format_srt_block(number, timing, translations.get(text, text)) + '\n\n'
+
+def match_translations(source_blocks, translated_blocks):
+    """Map each source text to its translation by pairing blocks on their id."""
+    translated_by_number = {}
+    for block in translated_blocks:
+        parsed = parse_srt_block(block)
+        if parsed:
+            translated_by_number[parsed[0]] = parsed[2]
+    return {
+        text: translated_by_number[number]
+        for number, _, text in source_blocks
+        if number in translated_by_number
+    }
\ No newline at end of file